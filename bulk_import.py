@@ -0,0 +1,216 @@
+# bulk_import.py
+"""Bulk import of historical menu items and sales from CSV or JSON Lines files.
+
+Meant for migrating years of data from another POS. Rows are streamed from the file,
+validated against the menu and written in large executemany batches, committing once
+per chunk together with a checkpoint, so an interrupted import resumes where it stopped
+and memory use does not grow with the size of the file.
+
+Sales columns: timestamp (YYYY-MM-DD HH:MM:SS), items, total_amount, payment_method.
+In CSV the items column holds the same JSON list the app stores, e.g.
+[{"name": "Pav Bhaji", "price": 80, "quantity": 2}]. Menu columns: name, price.
+
+Imported sales do not deduct ingredient stock; they are history, not today's sales.
+
+Usage:
+    python bulk_import.py menu old_menu.csv
+    python bulk_import.py sales old_sales.csv --db shop_data.db
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from database import Database
+
+PAYMENT_METHODS = ("Cash", "UPI")
+
+
+def iter_rows(path):
+    """Yields (line number, row dict) from a .csv or .jsonl file without loading it all."""
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            while True:
+                try:
+                    row = next(reader)
+                except StopIteration:
+                    return
+                except csv.Error as e: # e.g. an oversized field; the reader carries on with the next line
+                    row = {"__error__": f"unreadable CSV ({e})"}
+                yield reader.line_num, row
+    elif path.lower().endswith((".jsonl", ".ndjson")):
+        with open(path, encoding="utf-8") as f:
+            for line_num, line in enumerate(f, 1):
+                if not line.strip(): continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    row = {"__error__": f"invalid JSON ({e})"}
+                yield line_num, row
+    else:
+        raise ValueError(f"Unsupported file type: {path} (expected .csv or .jsonl)")
+
+
+class BulkImporter:
+    def __init__(self, db, batch_size=5000, commit_every=50000):
+        self.db = db
+        self.batch_size = batch_size
+        self.commit_every = commit_every
+        self.errors = []
+        self.rejected = 0
+        with self.db.conn:
+            self.db.conn.execute("CREATE TABLE IF NOT EXISTS import_progress (source TEXT PRIMARY KEY, rows_done INTEGER NOT NULL, finished INTEGER NOT NULL DEFAULT 0)")
+            # Columns added after the first version of this table
+            columns = {row[1] for row in self.db.conn.execute("PRAGMA table_info(import_progress)")}
+            for column in ("rejected", "file_size", "file_mtime"):
+                if column not in columns:
+                    self.db.conn.execute(f"ALTER TABLE import_progress ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+
+    # --- Validation: each returns a tuple of insert parameters or raises ValueError ---
+    def parse_menu_row(self, row):
+        name = str(row.get("name") or "").strip()
+        if not name: raise ValueError("missing name")
+        price = float(row.get("price"))
+        if price < 0: raise ValueError("negative price")
+        return (name, price)
+
+    def parse_sale_row(self, row):
+        timestamp = str(row.get("timestamp") or "").strip()
+        datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
+        items = row.get("items")
+        if isinstance(items, str): items = json.loads(items)
+        if not isinstance(items, list) or not items: raise ValueError("items must be a non-empty list")
+        for item in items:
+            if item.get("name") not in self.menu_names: raise ValueError(f"unknown menu item {item.get('name')!r}")
+            if int(item.get("quantity", 0)) <= 0: raise ValueError(f"bad quantity for {item['name']!r}")
+            float(item.get("price"))
+        total_amount = float(row.get("total_amount"))
+        payment_method = str(row.get("payment_method") or "").strip()
+        if payment_method not in PAYMENT_METHODS: raise ValueError(f"unknown payment method {payment_method!r}")
+        return (timestamp, json.dumps(items), total_amount, payment_method)
+
+    # --- Checkpoints ---
+    def get_progress(self, source):
+        """Returns (rows_done, finished, rejected, (file_size, file_mtime)) saved for source."""
+        cursor = self.db.conn.cursor()
+        cursor.execute("SELECT rows_done, finished, rejected, file_size, file_mtime FROM import_progress WHERE source = ?", (source,))
+        result = cursor.fetchone()
+        if not result: return 0, 0, 0, None
+        return result[0], result[1], result[2], (result[3], result[4])
+
+    def _save_progress(self, source, fingerprint, rows_done, finished=0):
+        self.db.conn.execute(
+            "INSERT OR REPLACE INTO import_progress (source, rows_done, finished, rejected, file_size, file_mtime) VALUES (?, ?, ?, ?, ?, ?)",
+            (source, rows_done, finished, self.rejected, *fingerprint)
+        )
+
+    # --- Deferred work for sales: the change feed trigger and any indexes on sales ---
+    def _suspend_sales_extras(self):
+        cursor = self.db.conn.cursor()
+        cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'sales' AND sql IS NOT NULL")
+        indexes = cursor.fetchall()
+        self.db.pause_sales_feed()
+        with self.db.conn:
+            for name, _ in indexes:
+                self.db.conn.execute(f'DROP INDEX IF EXISTS "{name}"')
+        return indexes
+
+    def _restore_sales_extras(self, indexes):
+        print("Rebuilding indexes and change feed...")
+        with self.db.conn:
+            for _, sql in indexes:
+                self.db.conn.execute(sql)
+        self.db.resume_sales_feed()
+
+    def run(self, kind, path, restart=False):
+        """Imports path as 'menu' or 'sales' and returns the number of rows inserted."""
+        source = f"{kind}:{os.path.abspath(path)}"
+        stat = os.stat(path)
+        fingerprint = (stat.st_size, stat.st_mtime_ns)
+        rows_done, finished, self.rejected, saved_fingerprint = (0, 0, 0, None) if restart else self.get_progress(source)
+        if finished:
+            print(f"{path} was already imported completely. Use --restart to import it again.")
+            return 0
+        if rows_done:
+            if saved_fingerprint != fingerprint:
+                # Skipping rows_done rows of different content would silently lose data
+                raise ValueError(f"{path} has changed since the interrupted import. Use --restart to import it from the beginning.")
+            print(f"Resuming {path} after row {rows_done}.")
+
+        if kind == "menu":
+            parse = self.parse_menu_row
+            sql = "INSERT INTO menu (name, price) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET price = excluded.price"
+            indexes = None
+        else:
+            parse = self.parse_sale_row
+            sql = "INSERT INTO sales (timestamp, items, total_amount, payment_method) VALUES (?, ?, ?, ?)"
+            self.menu_names = {name for name, _ in self.db.get_menu_items()}
+            indexes = self._suspend_sales_extras()
+
+        inserted, seen = 0, 0
+        batch = []
+        started = time.monotonic()
+        try:
+            self.db.conn.execute("BEGIN")
+            for line_num, row in iter_rows(path):
+                seen += 1
+                if seen <= rows_done: continue # Already committed by an earlier run
+                try:
+                    if "__error__" in row: raise ValueError(row["__error__"])
+                    batch.append(parse(row))
+                except (ValueError, TypeError, KeyError, AttributeError) as e:
+                    self.rejected += 1
+                    if len(self.errors) < 20: self.errors.append(f"line {line_num}: {e}")
+                if len(batch) >= self.batch_size:
+                    self.db.conn.executemany(sql, batch); inserted += len(batch); batch = []
+                if (seen - rows_done) % self.commit_every == 0:
+                    if batch: self.db.conn.executemany(sql, batch); inserted += len(batch); batch = []
+                    self._save_progress(source, fingerprint, seen)
+                    self.db.conn.commit()
+                    elapsed = max(time.monotonic() - started, 1e-9)
+                    print(f"  {seen} rows read, {inserted} inserted ({(seen - rows_done) / elapsed:.0f} rows/sec)")
+                    self.db.conn.execute("BEGIN")
+            if batch:
+                self.db.conn.executemany(sql, batch); inserted += len(batch)
+            self._save_progress(source, fingerprint, seen, finished=1)
+            self.db.conn.commit()
+        except BaseException:
+            self.db.conn.rollback() # Only the current chunk is lost; the checkpoint lets the next run resume
+            raise
+        finally:
+            if indexes is not None: self._restore_sales_extras(indexes)
+
+        elapsed = max(time.monotonic() - started, 1e-9)
+        print(f"Imported {inserted} {kind} rows from {path} in {elapsed:.1f}s ({(seen - rows_done) / elapsed:.0f} rows/sec), rejected {self.rejected} in total.")
+        for error in self.errors:
+            print(f"  rejected {error}")
+        return inserted
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import historical menu items or sales.")
+    parser.add_argument("kind", choices=["menu", "sales"])
+    parser.add_argument("path", help="A .csv or .jsonl file")
+    parser.add_argument("--db", default="shop_data.db")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per executemany call")
+    parser.add_argument("--commit-every", type=int, default=50000, help="Rows per transaction and checkpoint")
+    parser.add_argument("--restart", action="store_true", help="Ignore any saved progress for this file")
+    args = parser.parse_args(argv)
+
+    db = Database(args.db)
+    try:
+        BulkImporter(db, args.batch_size, args.commit_every).run(args.kind, args.path, args.restart)
+    except (OSError, ValueError) as e:
+        print(f"Import failed: {e}")
+        return 1
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
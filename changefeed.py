@@ -0,0 +1,227 @@
+# changefeed.py
+"""Delta files for consolidating several outlets' data on one office machine.
+
+Each outlet exports what changed since its last export with Database.export_changes().
+A delta is a gzip-compressed JSON Lines file: a header line describing where it came from
+and which change_log range it covers, followed by one line per change. Delta files are never
+rewritten, only new ones are added.
+
+Every outlet needs its own name (Settings > Outlet Name, or --outlet on export); the office
+database tracks progress per outlet name. Renaming a shop carries its feed on, and the office
+moves the shop's history to the new name. If a new outlet starts from a copy of another shop's
+shop_data.db, it must be given a new name as a new outlet (--outlet NAME --new-outlet, or
+"New Shop" in Settings) before its first export. Its feed then starts over without the sales
+copied from the other shop.
+
+Changes every consumer has exported are pruned from the outlet's change log after each export.
+
+Usage:
+    python changefeed.py export --db shop_data.db --consumer office --out outbox [--outlet NAME [--new-outlet]]
+    python changefeed.py merge consolidated.db outbox/*.jsonl.gz
+"""
+import argparse
+import gzip
+import json
+import os
+import re
+import sqlite3
+import sys
+import zlib
+
+FORMAT = "mp-delta"
+VERSION = 1
+
+# What a truncated, corrupt or foreign file can raise while being read
+BAD_DELTA_ERRORS = (OSError, EOFError, ValueError, KeyError, TypeError, zlib.error, sqlite3.IntegrityError)
+
+
+def write_delta(out_dir, outlet, from_seq, to_seq, rows, feed_start=0, renamed_from=()):
+    """Writes rows of (seq, entity, op, row_key, payload) to a new delta file and returns its path.
+
+    from_seq is exclusive and to_seq inclusive, so consecutive deltas chain together. feed_start
+    is where this outlet's feed began and renamed_from its earlier names, newest first.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    safe_outlet = re.sub(r"[^\w.-]+", "_", outlet) # The real name stays in the header
+    path = os.path.join(out_dir, f"{safe_outlet}-{from_seq:010d}-{to_seq:010d}.jsonl.gz")
+    tmp_path = path + ".tmp"
+    header = {"format": FORMAT, "version": VERSION, "outlet": outlet, "from_seq": from_seq, "to_seq": to_seq,
+              "feed_start": feed_start, "renamed_from": list(renamed_from)}
+    try:
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            f.write(json.dumps(header, ensure_ascii=False) + "\n")
+            for seq, entity, op, row_key, payload in rows:
+                record = {"seq": seq, "entity": entity, "op": op, "key": row_key,
+                          "data": json.loads(payload) if payload else None}
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path) # A delta only appears once it is complete
+    except BaseException:
+        if os.path.exists(tmp_path): os.remove(tmp_path)
+        raise
+    return path
+
+
+def read_delta_header(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+    if not isinstance(header, dict) or header.get("format") != FORMAT or header.get("version") != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} delta file")
+    return header
+
+
+def read_delta_records(path):
+    """Yields the change records of a delta file one at a time."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        f.readline() # Header
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class ConsolidatedDatabase:
+    """The office database holding every outlet's sales, menu and config side by side."""
+    def __init__(self, db_path):
+        self.conn = sqlite3.connect(db_path)
+        self.create_tables()
+
+    def create_tables(self):
+        with self.conn:
+            # outlets tracks progress per feed (the name a delta was exported under); outlet_aliases
+            # maps an outlet's earlier names to the name its data is stored under now
+            self.conn.execute("CREATE TABLE IF NOT EXISTS outlets (outlet TEXT PRIMARY KEY, last_seq INTEGER NOT NULL DEFAULT 0)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS outlet_aliases (alias TEXT PRIMARY KEY, outlet TEXT NOT NULL)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS sales (id INTEGER PRIMARY KEY, outlet TEXT NOT NULL, origin_id INTEGER NOT NULL, timestamp TEXT NOT NULL, items TEXT NOT NULL, total_amount REAL NOT NULL, payment_method TEXT NOT NULL, UNIQUE (outlet, origin_id))")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS menu (outlet TEXT NOT NULL, name TEXT NOT NULL, price REAL NOT NULL, PRIMARY KEY (outlet, name))")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS config (outlet TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (outlet, key))")
+
+    def get_last_seq(self, outlet):
+        """Returns the last applied seq of a feed, or None if nothing from it was applied yet."""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT last_seq FROM outlets WHERE outlet = ?", (outlet,))
+        result = cursor.fetchone()
+        return result[0] if result else None
+
+    def resolve_outlet(self, outlet):
+        """Returns the name an outlet's data is stored under, following renames."""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT outlet FROM outlet_aliases WHERE alias = ?", (outlet,))
+        result = cursor.fetchone()
+        return result[0] if result else outlet
+
+    def _starting_seq(self, header):
+        """Where a feed the office has not seen yet starts: where its previous name left off, if any."""
+        for old_name in header.get("renamed_from", []):
+            last_seq = self.get_last_seq(old_name)
+            if last_seq is not None: return last_seq
+        return header.get("feed_start", 0)
+
+    def _rename_outlet(self, outlet, old_names):
+        """Moves everything stored under old_names to outlet."""
+        self.conn.execute("DELETE FROM outlet_aliases WHERE alias = ?", (outlet,))
+        for old_name in old_names:
+            if old_name == outlet: continue
+            self.conn.execute("UPDATE outlet_aliases SET outlet = ? WHERE outlet = ?", (outlet, old_name))
+            self.conn.execute("INSERT OR REPLACE INTO outlet_aliases (alias, outlet) VALUES (?, ?)", (old_name, outlet))
+            for table in ("sales", "menu", "config"):
+                self.conn.execute(f"UPDATE OR REPLACE {table} SET outlet = ? WHERE outlet = ?", (outlet, old_name))
+
+    def apply_delta(self, path):
+        """Applies one delta file in a single transaction.
+
+        Returns "applied", "skipped" (already merged) or "gap" (an earlier delta from the
+        same outlet is missing). Re-applying a delta never changes anything. A file that cannot
+        be read raises one of BAD_DELTA_ERRORS and leaves the database untouched.
+        """
+        header = read_delta_header(path)
+        feed = header["outlet"]
+        last_seq = self.get_last_seq(feed)
+        if last_seq is None: last_seq = self._starting_seq(header)
+        if header["to_seq"] <= last_seq: return "skipped"
+        if header["from_seq"] > last_seq: return "gap"
+        with self.conn:
+            if header.get("renamed_from"): self._rename_outlet(feed, header["renamed_from"])
+            outlet = self.resolve_outlet(feed)
+            for record in read_delta_records(path):
+                if record["seq"] <= last_seq: continue # Overlaps a delta that was already merged
+                self._apply_record(outlet, record)
+            self.conn.execute(
+                "INSERT INTO outlets (outlet, last_seq) VALUES (?, ?) ON CONFLICT(outlet) DO UPDATE SET last_seq = excluded.last_seq",
+                (feed, header["to_seq"])
+            )
+        return "applied"
+
+    def _apply_record(self, outlet, record):
+        entity, op, key, data = record["entity"], record["op"], record["key"], record["data"]
+        if entity == "sales":
+            self.conn.execute(
+                "INSERT OR IGNORE INTO sales (outlet, origin_id, timestamp, items, total_amount, payment_method) VALUES (?, ?, ?, ?, ?, ?)",
+                (outlet, int(key), data["timestamp"], data["items"], data["total_amount"], data["payment_method"])
+            )
+        elif entity == "menu" and op == "upsert":
+            self.conn.execute("INSERT OR REPLACE INTO menu (outlet, name, price) VALUES (?, ?, ?)", (outlet, key, data["price"]))
+        elif entity == "menu" and op == "delete":
+            self.conn.execute("DELETE FROM menu WHERE outlet = ? AND name = ?", (outlet, key))
+        elif entity == "config":
+            self.conn.execute("INSERT OR REPLACE INTO config (outlet, key, value) VALUES (?, ?, ?)", (outlet, key, data["value"]))
+
+    def merge(self, paths):
+        """Applies many delta files, in order per outlet, and returns {path: result}.
+
+        Files that cannot be read get an "invalid: <reason>" result; the others are still merged.
+        """
+        results, headers = {}, {}
+        for path in paths:
+            try:
+                header = read_delta_header(path)
+                # Feeds under earlier names go first, so a renamed outlet picks up where they stopped
+                headers[path] = (len(header.get("renamed_from", [])), str(header["outlet"]), int(header["from_seq"]), int(header["to_seq"]))
+            except BAD_DELTA_ERRORS as e:
+                results[path] = f"invalid: {e}"
+        for path in sorted(headers, key=headers.get):
+            try:
+                results[path] = self.apply_delta(path)
+            except BAD_DELTA_ERRORS as e:
+                results[path] = f"invalid: {e}"
+        return results
+
+    def close(self):
+        self.conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export and merge outlet delta files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Write a delta with this outlet's new changes")
+    export_parser.add_argument("--db", default="shop_data.db")
+    export_parser.add_argument("--consumer", default="office", help="Who the delta is for; each consumer has its own high-water mark")
+    export_parser.add_argument("--out", default="outbox")
+    export_parser.add_argument("--outlet", help="Rename this outlet first")
+    export_parser.add_argument("--new-outlet", action="store_true", help="With --outlet: this database was copied from another shop, start a new feed")
+    merge_parser = commands.add_parser("merge", help="Apply delta files to a consolidated database")
+    merge_parser.add_argument("consolidated_db")
+    merge_parser.add_argument("deltas", nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        from database import Database
+        db = Database(args.db)
+        if args.outlet: db.set_outlet_id(args.outlet, new_outlet=args.new_outlet)
+        path = db.export_changes(args.consumer, args.out)
+        db.close()
+        print(path if path else "Nothing new to export.")
+        return 0
+
+    consolidated = ConsolidatedDatabase(args.consolidated_db)
+    try:
+        results = consolidated.merge(args.deltas)
+    finally:
+        consolidated.close()
+    for path, result in results.items():
+        print(f"{result:<8} {path}")
+    return 0 if all(result in ("applied", "skipped") for result in results.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+# dashboard.py
+from datetime import datetime
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QGridLayout, QLabel, QFrame
+from PyQt5.QtGui import QFont
+
+class DashboardTab(QWidget):
+    """Live view of the running shift. Reads only the in-memory ShiftMetrics, never the database."""
+    REFRESH_MS = 2000
+
+    def __init__(self, metrics, currency_symbol='₹', parent=None):
+        super().__init__(parent)
+        self.metrics = metrics
+        self.currency_symbol = currency_symbol
+        self.init_ui()
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(self.REFRESH_MS)
+
+    def init_ui(self):
+        main_layout = QVBoxLayout(self)
+        title = QLabel("Current Shift")
+        title.setFont(QFont("Arial", 18, QFont.Bold))
+        main_layout.addWidget(title)
+        self.shift_start_label = QLabel("")
+        main_layout.addWidget(self.shift_start_label)
+
+        grid = QGridLayout()
+        self.value_labels = {}
+        tiles = [("bills", "Bills"), ("total", "Total Sales"), ("average_ticket", "Average Bill"),
+                 ("cash", "Cash"), ("upi", "UPI"), ("window_items", f"Items Sold (last {int(self.metrics.window.total_seconds() // 60)} min)")]
+        for idx, (key, caption) in enumerate(tiles):
+            tile = QFrame(); tile.setFrameShape(QFrame.StyledPanel)
+            tile_layout = QVBoxLayout(tile)
+            caption_label = QLabel(caption); caption_label.setAlignment(Qt.AlignCenter)
+            value_label = QLabel("-"); value_label.setAlignment(Qt.AlignCenter)
+            value_label.setFont(QFont("Arial", 28, QFont.Bold))
+            tile_layout.addWidget(caption_label); tile_layout.addWidget(value_label)
+            self.value_labels[key] = value_label
+            grid.addWidget(tile, idx // 3, idx % 3)
+        main_layout.addLayout(grid)
+
+        self.updated_label = QLabel("")
+        self.updated_label.setAlignment(Qt.AlignRight)
+        main_layout.addStretch()
+        main_layout.addWidget(self.updated_label)
+        self.refresh()
+
+    def refresh(self):
+        stats = self.metrics.snapshot()
+        money = lambda amount: f"{self.currency_symbol}{amount:.2f}"
+        self.shift_start_label.setText(f"Since {stats['shift_start'].strftime('%d %b, %I:%M %p')}")
+        self.value_labels["bills"].setText(str(stats["bills"]))
+        self.value_labels["total"].setText(money(stats["total"]))
+        self.value_labels["average_ticket"].setText(money(stats["average_ticket"]))
+        self.value_labels["cash"].setText(money(stats["cash"]))
+        self.value_labels["upi"].setText(money(stats["upi"]))
+        self.value_labels["window_items"].setText(str(stats["window_items"]))
+        self.updated_label.setText(f"Updated {datetime.now().strftime('%I:%M:%S %p')}")
+
+    def set_currency_symbol(self, currency_symbol):
+        self.currency_symbol = currency_symbol
+        self.refresh()
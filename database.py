@@ -1,11 +1,14 @@
 # database.py
 import sqlite3
 import json
+import uuid
 from datetime import datetime
 
+import changefeed
+
 class Database:
-    def __init__(self):
-        self.conn = sqlite3.connect("shop_data.db", check_same_thread=False)
+    def __init__(self, db_path="shop_data.db"):
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
         self.create_tables()
 
     def create_tables(self):
@@ -16,16 +19,35 @@ class Database:
                 self.conn.execute("CREATE TABLE IF NOT EXISTS menu (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, price REAL NOT NULL)")
                 self.conn.execute("CREATE TABLE IF NOT EXISTS sales (id INTEGER PRIMARY KEY, timestamp TEXT NOT NULL, items TEXT NOT NULL, total_amount REAL NOT NULL, payment_method TEXT NOT NULL)")
                 
+                # Inventory: ingredient stock and how much of each ingredient a menu item uses.
+                # Recipes are keyed by menu item name because the menu is rewritten on every settings save.
+                self.conn.execute("CREATE TABLE IF NOT EXISTS ingredients (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, stock REAL NOT NULL DEFAULT 0, unit TEXT NOT NULL DEFAULT '', low_threshold REAL NOT NULL DEFAULT 0)")
+                self.conn.execute("CREATE TABLE IF NOT EXISTS recipes (menu_name TEXT NOT NULL, ingredient_name TEXT NOT NULL, quantity REAL NOT NULL, PRIMARY KEY (menu_name, ingredient_name))")
+
                 # Expanded config table
                 self.conn.execute("CREATE TABLE IF NOT EXISTS config (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
 
+                # Change feed: every sale, menu change and config change is appended here by triggers
+                cursor = self.conn.cursor()
+                cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'change_log'")
+                feed_is_new = cursor.fetchone()[0] == 0
+                self.conn.execute("CREATE TABLE IF NOT EXISTS change_log (seq INTEGER PRIMARY KEY AUTOINCREMENT, entity TEXT NOT NULL, op TEXT NOT NULL, row_key TEXT NOT NULL, payload TEXT)")
+                self.conn.execute("CREATE TABLE IF NOT EXISTS feed_consumers (consumer TEXT PRIMARY KEY, last_seq INTEGER NOT NULL DEFAULT 0)")
+                self.conn.execute("CREATE TABLE IF NOT EXISTS feed_state (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+                self.conn.execute("CREATE TABLE IF NOT EXISTS previous_outlet_ids (outlet_id TEXT PRIMARY KEY, renamed_at TEXT NOT NULL)")
+                if feed_is_new:
+                    self.backfill_change_log()
+                self.resume_sales_feed() # Catches up after a bulk import that was interrupted
+
                 # --- ADDED: Seed all default settings ---
                 default_configs = {
                     'shop_name': 'Misty Pavbhaji',
                     'password': '1234',
                     'gst_rate': '5.0',
                     'currency_symbol': '₹',
-                    'bill_footer': 'Thank you! Visit Again!'
+                    'bill_footer': 'Thank you! Visit Again!',
+                    'outlet_id': f"outlet-{uuid.uuid4().hex[:8]}",
+                    'shift_rollover_hour': '4'
                 }
                 for key, value in default_configs.items():
                     self.conn.execute("INSERT OR IGNORE INTO config (key, value) VALUES (?, ?)", (key, value))
@@ -39,6 +61,147 @@ class Database:
         except sqlite3.Error as e:
             print(f"Error creating tables: {e}")
 
+    def create_feed_triggers(self):
+        """Creates the triggers that append sales, menu and config changes to change_log."""
+        self.conn.execute("""CREATE TRIGGER IF NOT EXISTS sales_feed_insert AFTER INSERT ON sales BEGIN
+            INSERT INTO change_log (entity, op, row_key, payload) VALUES ('sales', 'insert', NEW.id,
+                json_object('timestamp', NEW.timestamp, 'items', NEW.items, 'total_amount', NEW.total_amount, 'payment_method', NEW.payment_method));
+        END""")
+        self.conn.execute("""CREATE TRIGGER IF NOT EXISTS menu_feed_insert AFTER INSERT ON menu BEGIN
+            INSERT INTO change_log (entity, op, row_key, payload) VALUES ('menu', 'upsert', NEW.name, json_object('price', NEW.price));
+        END""")
+        self.conn.execute("""CREATE TRIGGER IF NOT EXISTS menu_feed_update AFTER UPDATE ON menu BEGIN
+            INSERT INTO change_log (entity, op, row_key, payload) SELECT 'menu', 'delete', OLD.name, NULL WHERE OLD.name != NEW.name;
+            INSERT INTO change_log (entity, op, row_key, payload) VALUES ('menu', 'upsert', NEW.name, json_object('price', NEW.price));
+        END""")
+        self.conn.execute("""CREATE TRIGGER IF NOT EXISTS menu_feed_delete AFTER DELETE ON menu BEGIN
+            INSERT INTO change_log (entity, op, row_key, payload) VALUES ('menu', 'delete', OLD.name, NULL);
+        END""")
+        # The password never leaves the shop
+        for event in ("INSERT", "UPDATE"):
+            self.conn.execute(f"""CREATE TRIGGER IF NOT EXISTS config_feed_{event.lower()} AFTER {event} ON config WHEN NEW.key != 'password' BEGIN
+                INSERT INTO change_log (entity, op, row_key, payload) VALUES ('config', 'upsert', NEW.key, json_object('value', NEW.value));
+            END""")
+
+    def backfill_change_log(self):
+        """Logs rows that existed before the change feed did, so the first export contains everything."""
+        self.backfill_settings_feed()
+        self.backfill_sales_feed(0)
+
+    def backfill_settings_feed(self):
+        """Logs the current config and menu."""
+        self.conn.execute("INSERT INTO change_log (entity, op, row_key, payload) SELECT 'config', 'upsert', key, json_object('value', value) FROM config WHERE key != 'password' ORDER BY key")
+        self.conn.execute("INSERT INTO change_log (entity, op, row_key, payload) SELECT 'menu', 'upsert', name, json_object('price', price) FROM menu ORDER BY name")
+
+    def backfill_sales_feed(self, after_id):
+        """Logs every sale with an id above after_id."""
+        self.conn.execute("""INSERT INTO change_log (entity, op, row_key, payload)
+            SELECT 'sales', 'insert', id, json_object('timestamp', timestamp, 'items', items, 'total_amount', total_amount, 'payment_method', payment_method)
+            FROM sales WHERE id > ? ORDER BY id""", (after_id,))
+
+    def pause_sales_feed(self):
+        """Stops logging sales one by one, e.g. for a bulk import. resume_sales_feed() logs the missed ones in one go."""
+        with self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO feed_state (key, value) SELECT 'sales_paused_after', COALESCE(MAX(id), 0) FROM sales")
+            self.conn.execute("DROP TRIGGER IF EXISTS sales_feed_insert")
+
+    def resume_sales_feed(self):
+        """Logs the sales added while the feed was paused (if it was) and turns the triggers back on."""
+        with self.conn:
+            cursor = self.conn.cursor()
+            cursor.execute("SELECT value FROM feed_state WHERE key = 'sales_paused_after'")
+            result = cursor.fetchone()
+            if result:
+                self.backfill_sales_feed(result[0])
+                self.conn.execute("DELETE FROM feed_state WHERE key = 'sales_paused_after'")
+            self.create_feed_triggers()
+
+    def prune_change_log(self):
+        """Deletes changes that every consumer has already exported.
+
+        With no consumers nothing is deleted, so the first consumer still gets the full history.
+        A consumer added after that can no longer get it (see export_changes).
+        """
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO feed_state (key, value) SELECT 'pruned_through', MIN(last_seq) FROM feed_consumers HAVING COUNT(*) > 0")
+            self.conn.execute("DELETE FROM change_log WHERE seq <= (SELECT MIN(last_seq) FROM feed_consumers)")
+
+    def export_changes(self, consumer, out_dir):
+        """Writes everything logged since consumer's last export to a new delta file in out_dir.
+
+        Returns the path of the new file, or None if there was nothing new. The consumer's
+        high-water mark only moves once the file is safely on disk.
+        """
+        if not self.conn: return None
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("SELECT value FROM feed_state WHERE key = 'feed_start'")
+            result = cursor.fetchone()
+            feed_start = result[0] if result else 0
+            cursor.execute("SELECT last_seq FROM feed_consumers WHERE consumer = ?", (consumer,))
+            result = cursor.fetchone()
+            last_seq = result[0] if result else feed_start
+            cursor.execute("SELECT value FROM feed_state WHERE key = 'pruned_through'")
+            result = cursor.fetchone()
+            if result and last_seq < result[0]:
+                print(f"Cannot export for {consumer}: changes up to {result[0]} were already pruned.")
+                return None
+            cursor.execute("SELECT MAX(seq) FROM change_log")
+            to_seq = cursor.fetchone()[0] or 0
+            if to_seq <= last_seq: return None
+            outlet = self.get_config_value('outlet_id')
+            cursor.execute("SELECT outlet_id FROM previous_outlet_ids ORDER BY renamed_at DESC, rowid DESC")
+            renamed_from = [row[0] for row in cursor.fetchall()]
+            cursor.execute("SELECT seq, entity, op, row_key, payload FROM change_log WHERE seq > ? AND seq <= ? ORDER BY seq", (last_seq, to_seq))
+            path = changefeed.write_delta(out_dir, outlet, last_seq, to_seq, cursor, feed_start, renamed_from)
+            with self.conn:
+                self.conn.execute(
+                    "INSERT INTO feed_consumers (consumer, last_seq) VALUES (?, ?) ON CONFLICT(consumer) DO UPDATE SET last_seq = excluded.last_seq",
+                    (consumer, to_seq)
+                )
+            self.prune_change_log()
+            return path
+        except (sqlite3.Error, OSError) as e:
+            print(f"Error exporting changes for {consumer}: {e}")
+            return None
+
+    def set_outlet_id(self, outlet_id, new_outlet=False):
+        """Changes this outlet's name in the change feed.
+
+        By default this is a rename of the same shop: the feed carries on where it was and tells
+        the office the old names, so the office moves the outlet's history to the new name.
+
+        With new_outlet=True this database is treated as a different shop, e.g. one set up from
+        a copy of another shop's shop_data.db. Its feed starts over with just the current menu
+        and config; the sales it already holds belong to the other shop and are not exported.
+        """
+        outlet_id = outlet_id.strip()
+        old_outlet_id = self.get_config_value('outlet_id')
+        if not outlet_id or outlet_id == old_outlet_id: return False
+        try:
+            with self.conn:
+                if new_outlet:
+                    self.conn.execute("DELETE FROM feed_consumers")
+                    self.conn.execute("DELETE FROM previous_outlet_ids")
+                    self.conn.execute("DELETE FROM feed_state WHERE key IN ('pruned_through', 'sales_paused_after')")
+                    # Sequence numbers keep counting up; the office starts this outlet at the current one
+                    self.conn.execute("""INSERT OR REPLACE INTO feed_state (key, value)
+                        SELECT 'feed_start', COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'change_log'), 0)""")
+                else:
+                    self.conn.execute("DELETE FROM previous_outlet_ids WHERE outlet_id = ?", (outlet_id,))
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO previous_outlet_ids (outlet_id, renamed_at) VALUES (?, ?)",
+                        (old_outlet_id, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+                    )
+                self.conn.execute("INSERT OR REPLACE INTO config (key, value) VALUES ('outlet_id', ?)", (outlet_id,))
+                if new_outlet:
+                    self.conn.execute("DELETE FROM change_log") # Drop the outlet_id change logged above
+                    self.backfill_settings_feed()
+            return True
+        except sqlite3.Error as e:
+            print(f"Error renaming outlet to {outlet_id}: {e}")
+            return False
+
     def get_config_value(self, key, default_value=None):
         try:
             with self.conn:
@@ -83,6 +246,13 @@ class Database:
                     "INSERT INTO sales (timestamp, items, total_amount, payment_method) VALUES (?, ?, ?, ?)",
                     (timestamp, items_json, bill_details['final_total'], bill_details['payment_method'])
                 )
+                # Deduct every ingredient of the bill in one go, inside the same transaction as the sale.
+                self.conn.executemany(
+                    """UPDATE ingredients
+                       SET stock = stock - ? * (SELECT quantity FROM recipes WHERE menu_name = ? AND ingredient_name = ingredients.name)
+                       WHERE name IN (SELECT ingredient_name FROM recipes WHERE menu_name = ?)""",
+                    [(item['quantity'], item['name'], item['name']) for item in bill_details['items']]
+                )
             return True
         except sqlite3.Error as e:
             print(f"Error saving sale: {e}")
@@ -103,6 +273,20 @@ class Database:
             print(f"Error fetching sales for date {date_str}: {e}")
             return []
             
+    def get_sales_since(self, start_timestamp):
+        if not self.conn: return []
+        try:
+            with self.conn:
+                cursor = self.conn.cursor()
+                cursor.execute(
+                    "SELECT timestamp, items, total_amount, payment_method FROM sales WHERE timestamp >= ? ORDER BY timestamp DESC",
+                    (start_timestamp,)
+                )
+                return cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Error fetching sales since {start_timestamp}: {e}")
+            return []
+
     def get_sales_for_date_range(self, start_date, end_date):
         # ...
         if not self.conn: return []
@@ -118,6 +302,28 @@ class Database:
             print(f"Error fetching sales for range {start_date}-{end_date}: {e}")
             return []
 
+    def get_ingredients(self):
+        if not self.conn: return []
+        try:
+            with self.conn:
+                cursor = self.conn.cursor()
+                cursor.execute("SELECT name, stock, unit, low_threshold FROM ingredients ORDER BY name")
+                return cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Error fetching ingredients: {e}")
+            return []
+
+    def get_recipes(self):
+        if not self.conn: return []
+        try:
+            with self.conn:
+                cursor = self.conn.cursor()
+                cursor.execute("SELECT menu_name, ingredient_name, quantity FROM recipes ORDER BY menu_name, ingredient_name")
+                return cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Error fetching recipes: {e}")
+            return []
+
     def close(self):
         # ...
         if self.conn: self.conn.close()
\ No newline at end of file
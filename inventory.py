@@ -0,0 +1,56 @@
+# inventory.py
+
+class Inventory:
+    """In-memory copy of ingredient stock and recipes.
+
+    Loaded once from the database and then kept up to date incrementally
+    after each sale, so the billing screen can check stock on every tap
+    without going back to SQLite.
+    """
+    def __init__(self):
+        self.stock = {}        # ingredient name -> [stock, unit, low_threshold], a list so deduct() can update it in place
+        self.recipes = {}      # menu item name -> {ingredient name: qty per portion}
+
+    def load(self, ingredients, recipes):
+        self.stock = {name: [stock, unit, low] for name, stock, unit, low in ingredients}
+        self.recipes = {}
+        for menu_name, ingredient_name, quantity in recipes:
+            self.recipes.setdefault(menu_name, {})[ingredient_name] = quantity
+
+    def deduct(self, items):
+        """Mirrors the deduction Database.save_sale makes for a saved bill."""
+        for item in items:
+            for ingredient, qty in self.recipes.get(item['name'], {}).items():
+                if ingredient in self.stock:
+                    self.stock[ingredient][0] -= qty * item['quantity']
+
+    def _reserved(self, bill_items):
+        """Ingredients already used up by the items in the current (unsaved) bill."""
+        reserved = {}
+        for item in bill_items:
+            for ingredient, qty in self.recipes.get(item['name'], {}).items():
+                reserved[ingredient] = reserved.get(ingredient, 0) + qty * item['quantity']
+        return reserved
+
+    def portions_left(self, menu_name, bill_items=()):
+        """How many more portions of menu_name can be made, or None if it is not tracked."""
+        recipe = self.recipes.get(menu_name)
+        if not recipe: return None
+        reserved = self._reserved(bill_items)
+        portions = None
+        for ingredient, qty in recipe.items():
+            if ingredient not in self.stock or qty <= 0: continue
+            available = self.stock[ingredient][0] - reserved.get(ingredient, 0)
+            count = max(int(available // qty), 0)
+            portions = count if portions is None else min(portions, count)
+        return portions
+
+    def is_low(self, menu_name, bill_items=()):
+        """True if any ingredient of menu_name is at or below its low-stock threshold."""
+        reserved = self._reserved(bill_items)
+        for ingredient in self.recipes.get(menu_name, {}):
+            if ingredient not in self.stock: continue
+            stock, _, low = self.stock[ingredient]
+            if stock - reserved.get(ingredient, 0) <= low:
+                return True
+        return False
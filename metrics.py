@@ -0,0 +1,85 @@
+# metrics.py
+import json
+from collections import deque
+from datetime import datetime, timedelta
+
+class ShiftMetrics:
+    """Running totals for the current shift, kept in memory so the dashboard never has to query SQLite.
+
+    A shift runs from rollover_hour one day to rollover_hour the next, so a late-night shift keeps
+    its totals past midnight. Changing rollover_hour does not cut the current shift short: it
+    still ends when it was due to, and the new hour applies from the shift after.
+
+    Seeded once from the database at startup, then updated by each completed sale. Items sold in
+    the recent window are kept in per-second buckets, so recording a sale and reading the window
+    are both O(1) (amortised over the buckets that fall out of the window).
+    """
+    def __init__(self, window_minutes=15, rollover_hour=4):
+        self.window = timedelta(minutes=window_minutes)
+        self.rollover_hour = rollover_hour
+        self.buckets = deque()   # [second, items sold in that second], oldest first
+        self.window_items = 0
+        self.reset(self.shift_start_for(datetime.now()))
+
+    def shift_start_for(self, when):
+        start = when.replace(hour=self.rollover_hour, minute=0, second=0, microsecond=0)
+        return start if when >= start else start - timedelta(days=1)
+
+    def seed_from(self, now=None):
+        """Earliest sale time seed() needs: the shift start, or earlier if the window reaches back further."""
+        now = now or datetime.now()
+        return min(self.shift_start, now - self.window)
+
+    def reset(self, shift_start):
+        """Starts a new shift. The rolling window is left alone; it does not care about shifts."""
+        self.shift_start = shift_start
+        self.next_shift_start = self.shift_start_for(shift_start) + timedelta(days=1)
+        self.bills = 0
+        self.total = 0.0
+        self.by_method = {"Cash": 0.0, "UPI": 0.0}
+
+    def _roll_over(self, now):
+        if now >= self.next_shift_start:
+            # The hour may have changed since this shift started; never start before it was due to end
+            self.reset(max(self.shift_start_for(now), self.next_shift_start))
+
+    def seed(self, sales):
+        """Loads sales as returned by Database.get_sales_since(self.seed_from()) (newest first)."""
+        for timestamp, items_json, total_amount, payment_method in reversed(sales):
+            when = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
+            self.record_sale(total_amount, payment_method, json.loads(items_json), when)
+
+    def record_sale(self, total_amount, payment_method, items, when=None):
+        when = when or datetime.now()
+        self._roll_over(when)
+        if when >= self.shift_start: # Sales seeded from before the shift only count towards the window
+            self.bills += 1
+            self.total += total_amount
+            self.by_method[payment_method] = self.by_method.get(payment_method, 0.0) + total_amount
+        quantity = sum(item['quantity'] for item in items)
+        second = when.replace(microsecond=0)
+        if self.buckets and self.buckets[-1][0] == second:
+            self.buckets[-1][1] += quantity
+        else:
+            self.buckets.append([second, quantity])
+        self.window_items += quantity
+        self._expire(when)
+
+    def _expire(self, now):
+        cutoff = now - self.window # A sale drops out once it is a full window old
+        while self.buckets and self.buckets[0][0] <= cutoff:
+            self.window_items -= self.buckets.popleft()[1]
+
+    def snapshot(self, now=None):
+        now = now or datetime.now()
+        self._roll_over(now)
+        self._expire(now)
+        return {
+            "shift_start": self.shift_start,
+            "bills": self.bills,
+            "total": self.total,
+            "cash": self.by_method.get("Cash", 0.0),
+            "upi": self.by_method.get("UPI", 0.0),
+            "average_ticket": self.total / self.bills if self.bills else 0.0,
+            "window_items": self.window_items,
+        }
@@ -1,9 +1,9 @@
 # settings.py
 import sqlite3
 from PyQt5.QtCore import Qt, pyqtSignal
-from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QLabel, QLineEdit,
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
                              QPushButton, QTableWidget, QTableWidgetItem,
-                             QHeaderView, QMessageBox, QFormLayout, QDoubleSpinBox)
+                             QHeaderView, QMessageBox, QFormLayout, QDoubleSpinBox, QSpinBox)
 from PyQt5.QtGui import QFont
 
 class SettingsTab(QWidget):
@@ -48,6 +48,11 @@ class SettingsTab(QWidget):
         self.gst_rate_spinbox.setSuffix(" %")
         self.currency_symbol_input = QLineEdit()
         self.bill_footer_input = QLineEdit()
+        self.shift_rollover_spinbox = QSpinBox()
+        self.shift_rollover_spinbox.setRange(0, 23)
+        self.shift_rollover_spinbox.setSuffix(":00")
+        self.outlet_id_input = QLineEdit()
+        self.outlet_id_input.setToolTip("Name of this shop in the office's combined sales. Give every outlet a different name.")
         self.new_password_input = QLineEdit()
         self.new_password_input.setEchoMode(QLineEdit.Password)
         self.confirm_password_input = QLineEdit()
@@ -57,6 +62,8 @@ class SettingsTab(QWidget):
         form_layout.addRow("GST/Tax Rate:", self.gst_rate_spinbox)
         form_layout.addRow("Currency Symbol:", self.currency_symbol_input)
         form_layout.addRow("Bill Footer Message:", self.bill_footer_input)
+        form_layout.addRow("New Shift Starts At:", self.shift_rollover_spinbox)
+        form_layout.addRow("Outlet Name:", self.outlet_id_input)
         form_layout.addRow("New Password:", self.new_password_input)
         form_layout.addRow("Confirm New Password:", self.confirm_password_input)
         
@@ -82,6 +89,39 @@ class SettingsTab(QWidget):
 
         settings_layout.addWidget(add_button)
         settings_layout.addWidget(remove_button)
+
+        # Stock editor: current stock of each ingredient and when to warn
+        settings_layout.addWidget(QLabel("Manage Stock"))
+        self.stock_table = QTableWidget()
+        self.stock_table.setColumnCount(4)
+        self.stock_table.setHorizontalHeaderLabels(["Ingredient", "In Stock", "Unit", "Low Alert At"])
+        self.stock_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        settings_layout.addWidget(self.stock_table)
+        stock_buttons = QHBoxLayout()
+        add_stock_button = QPushButton("Add Ingredient")
+        add_stock_button.clicked.connect(lambda: self.stock_table.insertRow(self.stock_table.rowCount()))
+        remove_stock_button = QPushButton("Remove Selected Ingredient")
+        remove_stock_button.clicked.connect(lambda: self.stock_table.removeRow(self.stock_table.currentRow()))
+        stock_buttons.addWidget(add_stock_button)
+        stock_buttons.addWidget(remove_stock_button)
+        settings_layout.addLayout(stock_buttons)
+
+        # Recipe editor: how much of each ingredient one portion of a menu item uses
+        settings_layout.addWidget(QLabel("Recipes (per portion)"))
+        self.recipe_table = QTableWidget()
+        self.recipe_table.setColumnCount(3)
+        self.recipe_table.setHorizontalHeaderLabels(["Menu Item", "Ingredient", "Qty Used"])
+        self.recipe_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        settings_layout.addWidget(self.recipe_table)
+        recipe_buttons = QHBoxLayout()
+        add_recipe_button = QPushButton("Add Recipe Line")
+        add_recipe_button.clicked.connect(lambda: self.recipe_table.insertRow(self.recipe_table.rowCount()))
+        remove_recipe_button = QPushButton("Remove Selected Line")
+        remove_recipe_button.clicked.connect(lambda: self.recipe_table.removeRow(self.recipe_table.currentRow()))
+        recipe_buttons.addWidget(add_recipe_button)
+        recipe_buttons.addWidget(remove_recipe_button)
+        settings_layout.addLayout(recipe_buttons)
+
         settings_layout.addWidget(self.save_button)
 
         self.main_layout.addWidget(self.lock_widget)
@@ -106,10 +146,13 @@ class SettingsTab(QWidget):
         self.gst_rate_spinbox.setValue(float(self.db.get_config_value('gst_rate', '5.0')))
         self.currency_symbol_input.setText(self.db.get_config_value('currency_symbol', '₹'))
         self.bill_footer_input.setText(self.db.get_config_value('bill_footer', ''))
+        self.shift_rollover_spinbox.setValue(int(self.db.get_config_value('shift_rollover_hour', '4')))
+        self.outlet_id_input.setText(self.db.get_config_value('outlet_id', ''))
         # Clear password fields
         self.new_password_input.clear()
         self.confirm_password_input.clear()
         self.load_menu_items()
+        self.load_inventory()
 
     def save_all_changes(self):
         """Saves all general settings and menu items to the DB."""
@@ -119,6 +162,8 @@ class SettingsTab(QWidget):
             self.db.set_config_value('gst_rate', str(self.gst_rate_spinbox.value()))
             self.db.set_config_value('currency_symbol', self.currency_symbol_input.text())
             self.db.set_config_value('bill_footer', self.bill_footer_input.text())
+            self.db.set_config_value('shift_rollover_hour', str(self.shift_rollover_spinbox.value()))
+            self.save_outlet_id()
 
             # --- Password change logic ---
             new_pass = self.new_password_input.text()
@@ -131,6 +176,11 @@ class SettingsTab(QWidget):
             
             # --- Save menu items ---
             self.save_menu_items()
+            rejected_recipes = self.save_inventory()
+            if rejected_recipes:
+                QMessageBox.warning(self, "Recipe Lines Not Saved",
+                                    "These recipe lines were not saved:\n" + "\n".join(rejected_recipes))
+                self.load_inventory() # Show what was actually saved
 
             QMessageBox.information(self, "Success", "All changes have been saved!\nSome changes may require a restart to apply everywhere.")
             self.config_changed.emit() # Notify main window
@@ -138,6 +188,21 @@ class SettingsTab(QWidget):
         except Exception as e:
             QMessageBox.critical(self, "Error", f"An error occurred while saving: {e}")
 
+    def save_outlet_id(self):
+        new_outlet_id = self.outlet_id_input.text().strip()
+        if not new_outlet_id or new_outlet_id == self.db.get_config_value('outlet_id'): return
+        box = QMessageBox(self)
+        box.setWindowTitle("Outlet Name Changed")
+        box.setText("Is this the same shop under a new name, or a new shop set up with a copy of another shop's data?")
+        rename_button = box.addButton("Same Shop, New Name", QMessageBox.AcceptRole)
+        new_shop_button = box.addButton("New Shop", QMessageBox.DestructiveRole)
+        box.addButton(QMessageBox.Cancel)
+        box.exec_()
+        if box.clickedButton() == rename_button:
+            self.db.set_outlet_id(new_outlet_id)
+        elif box.clickedButton() == new_shop_button:
+            self.db.set_outlet_id(new_outlet_id, new_outlet=True)
+
     # ... (lock_settings, load_menu_items, save_menu_items etc.)
     def lock_settings(self):
         if self.is_unlocked:
@@ -167,4 +232,67 @@ class SettingsTab(QWidget):
                 name = self.table.item(row, 0).text().strip()
                 price_text = self.table.item(row, 1).text().strip()
                 if not name or not price_text: continue
-                self.db.conn.execute("INSERT INTO menu (name, price) VALUES (?, ?)", (name, float(price_text)))
\ No newline at end of file
+                self.db.conn.execute("INSERT INTO menu (name, price) VALUES (?, ?)", (name, float(price_text)))
+
+    def load_inventory(self):
+        try:
+            ingredients = self.db.get_ingredients()
+            self.stock_table.setRowCount(len(ingredients))
+            for row_idx, (name, stock, unit, low_threshold) in enumerate(ingredients):
+                self.stock_table.setItem(row_idx, 0, QTableWidgetItem(name))
+                self.stock_table.setItem(row_idx, 1, QTableWidgetItem(str(stock)))
+                self.stock_table.setItem(row_idx, 2, QTableWidgetItem(unit))
+                self.stock_table.setItem(row_idx, 3, QTableWidgetItem(str(low_threshold)))
+            recipes = self.db.get_recipes()
+            self.recipe_table.setRowCount(len(recipes))
+            for row_idx, (menu_name, ingredient_name, quantity) in enumerate(recipes):
+                self.recipe_table.setItem(row_idx, 0, QTableWidgetItem(menu_name))
+                self.recipe_table.setItem(row_idx, 1, QTableWidgetItem(ingredient_name))
+                self.recipe_table.setItem(row_idx, 2, QTableWidgetItem(str(quantity)))
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Database Error", f"Could not load stock: {e}")
+
+    def _cell_text(self, table, row, col):
+        item = table.item(row, col)
+        return item.text().strip() if item else ""
+
+    def save_inventory(self):
+        # Same approach as the menu: replace everything with what is on screen
+        with self.db.conn:
+            self.db.conn.execute("DELETE FROM ingredients")
+            for row in range(self.stock_table.rowCount()):
+                name = self._cell_text(self.stock_table, row, 0)
+                stock_text = self._cell_text(self.stock_table, row, 1)
+                if not name or not stock_text: continue
+                low_text = self._cell_text(self.stock_table, row, 3) or "0"
+                self.db.conn.execute(
+                    "INSERT INTO ingredients (name, stock, unit, low_threshold) VALUES (?, ?, ?, ?)",
+                    (name, float(stock_text), self._cell_text(self.stock_table, row, 2), float(low_text))
+                )
+            # Recipes are keyed by name, so only keep lines that point at a real menu item and
+            # ingredient. This also drops recipes of menu items that were just removed.
+            menu_names = {row[0] for row in self.db.conn.execute("SELECT name FROM menu")}
+            ingredient_names = {row[0] for row in self.db.conn.execute("SELECT name FROM ingredients")}
+            rejected = []
+            self.db.conn.execute("DELETE FROM recipes")
+            for row in range(self.recipe_table.rowCount()):
+                menu_name = self._cell_text(self.recipe_table, row, 0)
+                ingredient_name = self._cell_text(self.recipe_table, row, 1)
+                qty_text = self._cell_text(self.recipe_table, row, 2)
+                if not menu_name and not ingredient_name and not qty_text: continue
+                line = f"{menu_name or '?'} / {ingredient_name or '?'} / {qty_text or '?'}"
+                try:
+                    quantity = float(qty_text)
+                except ValueError:
+                    rejected.append(f"{line}: quantity is not a number"); continue
+                if menu_name not in menu_names:
+                    rejected.append(f"{line}: no such menu item"); continue
+                if ingredient_name not in ingredient_names:
+                    rejected.append(f"{line}: no such ingredient"); continue
+                if quantity <= 0:
+                    rejected.append(f"{line}: quantity must be more than 0"); continue
+                self.db.conn.execute(
+                    "INSERT OR REPLACE INTO recipes (menu_name, ingredient_name, quantity) VALUES (?, ?, ?)",
+                    (menu_name, ingredient_name, quantity)
+                )
+        return rejected
@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from bulk_import import BulkImporter
+from database import Database
+
+
+def write_sales(path, names):
+    with open(path, "w") as f:
+        for name in names:
+            f.write(json.dumps({"timestamp": "2021-03-04 12:00:00", "items": [{"name": name, "price": 80, "quantity": 1}],
+                                "total_amount": 80, "payment_method": "Cash"}) + "\n")
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "shop.db"))
+    yield database
+    database.close()
+
+
+def count_sales(db):
+    return db.conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0]
+
+
+def interrupt_after_first_chunk(importer):
+    save_progress, calls = importer._save_progress, []
+    def flaky_save_progress(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 2: raise KeyboardInterrupt
+        save_progress(*args, **kwargs)
+    importer._save_progress = flaky_save_progress
+
+
+def test_resume_keeps_rejected_count(db, tmp_path):
+    path = str(tmp_path / "sales.jsonl")
+    write_sales(path, ["Vada", "Pav Bhaji", "Pulao", "Pav Bhaji"])
+    importer = BulkImporter(db, batch_size=1, commit_every=2)
+    interrupt_after_first_chunk(importer)
+    with pytest.raises(KeyboardInterrupt):
+        importer.run("sales", path)
+    assert count_sales(db) == 1
+
+    resumed = BulkImporter(db, batch_size=1, commit_every=2)
+    assert resumed.run("sales", path) == 2
+    assert resumed.rejected == 1
+    assert count_sales(db) == 3
+    assert db.conn.execute("SELECT COUNT(*) FROM change_log WHERE entity = 'sales'").fetchone()[0] == 3
+
+
+def test_changed_file_is_not_resumed_without_restart(db, tmp_path):
+    path = str(tmp_path / "sales.jsonl")
+    write_sales(path, ["Pav Bhaji"] * 4)
+    importer = BulkImporter(db, batch_size=1, commit_every=2)
+    interrupt_after_first_chunk(importer)
+    with pytest.raises(KeyboardInterrupt):
+        importer.run("sales", path)
+
+    write_sales(path, ["Pulao"] * 5)
+    with pytest.raises(ValueError, match="--restart"):
+        BulkImporter(db).run("sales", path)
+    assert BulkImporter(db).run("sales", path, restart=True) == 5
+
+
+def test_unreadable_csv_row_is_rejected(db, tmp_path):
+    path = str(tmp_path / "menu.csv")
+    with open(path, "w") as f:
+        f.write("name,price\n")
+        f.write("Masala Pav,50\n")
+        f.write('"' + "x" * 200000 + '",10\n') # Longer than csv's default field limit
+        f.write("Tawa Pulao,95\n")
+    importer = BulkImporter(db)
+    assert importer.run("menu", path) == 2
+    assert importer.rejected == 1
+    assert {"Masala Pav", "Tawa Pulao"} <= {name for name, _ in db.get_menu_items()}
@@ -0,0 +1,187 @@
+import gzip
+import os
+
+import pytest
+
+import changefeed
+from changefeed import ConsolidatedDatabase
+from database import Database
+
+PAV_BHAJI = [{'name': 'Pav Bhaji', 'price': 80.0, 'quantity': 1}]
+
+
+def sell(db, payment_method="Cash"):
+    assert db.save_sale({'items': PAV_BHAJI, 'final_total': 80.0, 'payment_method': payment_method})
+
+
+@pytest.fixture
+def outlet(tmp_path):
+    db = Database(str(tmp_path / "outlet.db"))
+    db.set_outlet_id("andheri")
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def office(tmp_path):
+    consolidated = ConsolidatedDatabase(str(tmp_path / "office.db"))
+    yield consolidated
+    consolidated.close()
+
+
+def count_sales(office):
+    return office.conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0]
+
+
+def test_reapplying_a_delta_changes_nothing(outlet, office, tmp_path):
+    sell(outlet); sell(outlet, "UPI")
+    path = outlet.export_changes("office", str(tmp_path / "out"))
+
+    assert office.merge([path]) == {path: "applied"}
+    assert office.merge([path]) == {path: "skipped"}
+    assert count_sales(office) == 2
+
+
+def test_overlapping_delta_only_applies_new_changes(outlet, office, tmp_path):
+    sell(outlet); sell(outlet)
+    rows = outlet.conn.execute("SELECT seq, entity, op, row_key, payload FROM change_log ORDER BY seq").fetchall()
+    middle, last = rows[-2][0], rows[-1][0]
+    # As if an export was written but its high-water mark never saved, so the next one starts over
+    first = changefeed.write_delta(str(tmp_path / "a"), "andheri", 0, middle, rows[:-1])
+    overlapping = changefeed.write_delta(str(tmp_path / "b"), "andheri", 0, last, rows)
+
+    assert office.merge([first]) == {first: "applied"}
+    assert count_sales(office) == 1
+    assert office.merge([overlapping]) == {overlapping: "applied"}
+    assert count_sales(office) == 2
+
+
+def test_new_consumer_is_refused_once_history_is_pruned(outlet, tmp_path):
+    sell(outlet)
+    assert outlet.export_changes("office", str(tmp_path / "out"))
+    assert outlet.export_changes("laptop", str(tmp_path / "laptop")) is None
+
+
+def test_missing_delta_is_reported_as_gap(outlet, office, tmp_path):
+    sell(outlet)
+    first = outlet.export_changes("office", str(tmp_path / "out"))
+    sell(outlet)
+    second = outlet.export_changes("office", str(tmp_path / "out"))
+
+    assert office.merge([second]) == {second: "gap"}
+    assert count_sales(office) == 0
+    assert office.merge([second, first]) == {first: "applied", second: "applied"}
+    assert count_sales(office) == 2
+
+
+def test_password_is_never_exported(outlet, office, tmp_path):
+    outlet.set_config_value('password', 'secret')
+    path = outlet.export_changes("office", str(tmp_path / "out"))
+
+    keys = [record["key"] for record in changefeed.read_delta_records(path) if record["entity"] == "config"]
+    assert 'shop_name' in keys and 'password' not in keys
+    office.merge([path])
+    assert office.conn.execute("SELECT COUNT(*) FROM config WHERE key = 'password'").fetchone()[0] == 0
+
+
+def test_unreadable_files_are_reported_and_the_rest_merged(outlet, office, tmp_path):
+    sell(outlet)
+    good = outlet.export_changes("office", str(tmp_path / "out"))
+    truncated = str(tmp_path / "truncated.jsonl.gz")
+    with open(good, "rb") as f:
+        data = f.read()
+    with open(truncated, "wb") as f:
+        f.write(data[:len(data) // 2])
+    not_gzip = str(tmp_path / "notes.jsonl.gz")
+    with open(not_gzip, "w") as f:
+        f.write("hello")
+    not_delta = str(tmp_path / "other.jsonl.gz")
+    with gzip.open(not_delta, "wt") as f:
+        f.write('{"some": "thing"}\n')
+
+    results = office.merge([truncated, not_gzip, not_delta, good])
+    assert results[good] == "applied"
+    assert all(results[path].startswith("invalid") for path in (truncated, not_gzip, not_delta))
+    assert count_sales(office) == 1
+
+
+def test_change_log_is_pruned_once_every_consumer_has_exported(outlet, tmp_path):
+    sell(outlet)
+    outlet.export_changes("office", str(tmp_path / "out"))
+    assert outlet.conn.execute("SELECT COUNT(*) FROM change_log").fetchone()[0] == 0
+
+    sell(outlet)
+    outlet.export_changes("office", str(tmp_path / "out"))
+    assert outlet.conn.execute("SELECT COUNT(*) FROM change_log").fetchone()[0] == 0
+
+
+def total_by_outlet(office):
+    return dict(office.conn.execute("SELECT outlet, SUM(total_amount) FROM sales GROUP BY outlet").fetchall())
+
+
+def test_copy_set_up_as_new_outlet_does_not_resend_inherited_sales(outlet, office, tmp_path):
+    sell(outlet)
+    first = outlet.export_changes("office", str(tmp_path / "out"))
+    outlet.close()
+    copy_path = str(tmp_path / "copy.db")
+    with open(str(tmp_path / "outlet.db"), "rb") as src, open(copy_path, "wb") as dst:
+        dst.write(src.read())
+    copy = Database(copy_path)
+    copy.set_outlet_id("bandra", new_outlet=True)
+    sell(copy)
+    second = copy.export_changes("office", str(tmp_path / "out"))
+    copy.close()
+
+    assert office.merge([first, second]) == {first: "applied", second: "applied"}
+    outlets = dict(office.conn.execute("SELECT outlet, COUNT(*) FROM sales GROUP BY outlet").fetchall())
+    assert outlets == {"andheri": 1, "bandra": 1}
+    assert office.conn.execute("SELECT COUNT(*) FROM menu WHERE outlet = 'bandra'").fetchone()[0] == 2
+    assert os.path.basename(second).startswith("bandra-")
+
+
+def test_rename_moves_history_instead_of_resending_it(outlet, office, tmp_path):
+    sell(outlet); sell(outlet); sell(outlet)
+    office.merge([outlet.export_changes("office", str(tmp_path / "out"))])
+
+    outlet.set_outlet_id("Andheri West")
+    sell(outlet)
+    renamed = outlet.export_changes("office", str(tmp_path / "out"))
+
+    assert office.merge([renamed]) == {renamed: "applied"}
+    assert total_by_outlet(office) == {"Andheri West": 320.0}
+    assert office.conn.execute("SELECT COUNT(*) FROM menu WHERE outlet = 'andheri'").fetchone()[0] == 0
+
+
+def test_rename_keeps_sales_not_yet_exported_and_late_old_deltas(outlet, office, tmp_path):
+    sell(outlet)
+    before = outlet.export_changes("office", str(tmp_path / "out"))
+    sell(outlet)
+    outlet.set_outlet_id("Andheri West")
+    sell(outlet)
+    after = outlet.export_changes("office", str(tmp_path / "out"))
+
+    # The delta under the new name arrives first; the old one is still pending
+    assert office.merge([after]) == {after: "gap"}
+    assert office.merge([after, before]) == {before: "applied", after: "applied"}
+    assert total_by_outlet(office) == {"Andheri West": 240.0}
+
+
+def test_outlet_name_is_made_safe_for_the_file_name(outlet, office, tmp_path):
+    outlet.set_outlet_id("Andheri/West")
+    sell(outlet)
+    path = outlet.export_changes("office", str(tmp_path / "out"))
+
+    assert os.path.dirname(path) == str(tmp_path / "out")
+    assert changefeed.read_delta_header(path)["outlet"] == "Andheri/West"
+    office.merge([path])
+    assert total_by_outlet(office) == {"Andheri/West": 80.0}
+
+
+def test_failed_write_leaves_no_temporary_file(tmp_path):
+    def rows():
+        yield (1, "menu", "upsert", "Pulao", '{"price": 90}')
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        changefeed.write_delta(str(tmp_path / "out"), "andheri", 0, 2, rows())
+    assert os.listdir(str(tmp_path / "out")) == []
@@ -0,0 +1,74 @@
+import pytest
+
+from database import Database
+from inventory import Inventory
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "shop.db"))
+    with database.conn:
+        database.conn.executemany("INSERT INTO ingredients (name, stock, unit, low_threshold) VALUES (?, ?, ?, ?)",
+                                  [("Pav", 10.0, "pcs", 4.0), ("Bhaji", 1000.0, "g", 200.0), ("Butter", 100.0, "g", 10.0)])
+        database.conn.executemany("INSERT INTO recipes (menu_name, ingredient_name, quantity) VALUES (?, ?, ?)",
+                                  [("Pav Bhaji", "Pav", 2.0), ("Pav Bhaji", "Bhaji", 150.0), ("Pav Bhaji", "Butter", 10.0),
+                                   ("Pulao", "Butter", 5.0)])
+    yield database
+    database.close()
+
+
+def loaded(db):
+    inventory = Inventory()
+    inventory.load(db.get_ingredients(), db.get_recipes())
+    return inventory
+
+
+def stock_in_db(db):
+    return {name: stock for name, stock, _, _ in db.get_ingredients()}
+
+
+def bill(*items):
+    return [{'name': name, 'price': 80.0, 'quantity': quantity} for name, quantity in items]
+
+
+def test_save_sale_deducts_ingredients_and_matches_in_memory_stock(db):
+    inventory = loaded(db)
+    items = bill(("Pav Bhaji", 2), ("Pulao", 1), ("Masala Chaas", 3))
+
+    assert db.save_sale({'items': items, 'final_total': 250.0, 'payment_method': 'Cash'})
+    inventory.deduct(items)
+
+    assert stock_in_db(db) == {"Pav": 6.0, "Bhaji": 700.0, "Butter": 75.0}
+    assert {name: entry[0] for name, entry in inventory.stock.items()} == stock_in_db(db)
+
+
+def test_failed_deduction_rolls_back_the_sale(db):
+    db.conn.execute("CREATE TRIGGER fail_bhaji BEFORE UPDATE ON ingredients WHEN NEW.name = 'Bhaji' BEGIN SELECT RAISE(ABORT, 'boom'); END")
+
+    assert not db.save_sale({'items': bill(("Pav Bhaji", 1)), 'final_total': 80.0, 'payment_method': 'Cash'})
+    assert db.conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0] == 0
+    assert stock_in_db(db) == {"Pav": 10.0, "Bhaji": 1000.0, "Butter": 100.0}
+
+
+def test_portions_left_counts_items_already_on_the_bill(db):
+    inventory = loaded(db)
+
+    assert inventory.portions_left("Pav Bhaji") == 5 # Pav is the limit: 10 / 2
+    assert inventory.portions_left("Pav Bhaji", bill(("Pav Bhaji", 3))) == 2
+    assert inventory.portions_left("Pav Bhaji", bill(("Pav Bhaji", 5))) == 0
+    assert inventory.portions_left("Pulao", bill(("Pav Bhaji", 5))) == 10 # 100g butter - 50g on the bill
+
+
+def test_is_low_counts_items_already_on_the_bill(db):
+    inventory = loaded(db)
+
+    assert not inventory.is_low("Pav Bhaji")
+    assert not inventory.is_low("Pav Bhaji", bill(("Pav Bhaji", 2)))
+    assert inventory.is_low("Pav Bhaji", bill(("Pav Bhaji", 3))) # 4 pav left, at the threshold
+
+
+def test_items_without_a_recipe_are_not_tracked(db):
+    inventory = loaded(db)
+
+    assert inventory.portions_left("Masala Chaas") is None
+    assert not inventory.is_low("Masala Chaas")
@@ -0,0 +1,65 @@
+import json
+from datetime import datetime
+
+from metrics import ShiftMetrics
+
+TWO_PAV_BHAJI = [{'name': 'Pav Bhaji', 'price': 80.0, 'quantity': 2}]
+
+
+def at(text):
+    return datetime.strptime(text, "%Y-%m-%d %H:%M:%S")
+
+
+def test_sale_stays_in_window_for_the_full_fifteen_minutes():
+    metrics = ShiftMetrics()
+    metrics.record_sale(160.0, "Cash", TWO_PAV_BHAJI, at("2026-10-19 12:00:30"))
+
+    assert metrics.snapshot(at("2026-10-19 12:15:01"))["window_items"] == 2
+    assert metrics.snapshot(at("2026-10-19 12:15:29"))["window_items"] == 2
+    assert metrics.snapshot(at("2026-10-19 12:15:30"))["window_items"] == 0
+
+
+def test_shift_carries_on_past_midnight():
+    metrics = ShiftMetrics(rollover_hour=4)
+    metrics.reset(metrics.shift_start_for(at("2026-10-19 23:00:00")))
+    metrics.record_sale(160.0, "UPI", TWO_PAV_BHAJI, at("2026-10-19 23:55:00"))
+
+    stats = metrics.snapshot(at("2026-10-20 00:02:00"))
+    assert (stats["bills"], stats["upi"], stats["window_items"]) == (1, 160.0, 2)
+
+
+def test_new_shift_resets_totals_but_not_the_window():
+    metrics = ShiftMetrics(rollover_hour=4)
+    metrics.reset(metrics.shift_start_for(at("2026-10-20 03:00:00")))
+    metrics.record_sale(160.0, "Cash", TWO_PAV_BHAJI, at("2026-10-20 03:55:00"))
+
+    stats = metrics.snapshot(at("2026-10-20 04:05:00"))
+    assert (stats["bills"], stats["total"], stats["window_items"]) == (0, 0.0, 2)
+    assert stats["shift_start"] == at("2026-10-20 04:00:00")
+
+
+def test_seed_counts_earlier_sales_only_in_the_window():
+    metrics = ShiftMetrics(rollover_hour=4)
+    metrics.reset(at("2026-10-20 04:00:00"))
+    rows = [("2026-10-20 04:01:00", json.dumps(TWO_PAV_BHAJI), 160.0, "Cash"),
+            ("2026-10-20 03:58:00", json.dumps(TWO_PAV_BHAJI), 160.0, "UPI")] # Newest first, like the DB
+
+    metrics.seed(rows)
+    stats = metrics.snapshot(at("2026-10-20 04:05:00"))
+    assert (stats["bills"], stats["cash"], stats["upi"], stats["window_items"]) == (1, 160.0, 0.0, 4)
+
+
+def test_changing_rollover_hour_mid_shift_keeps_the_current_shift():
+    metrics = ShiftMetrics(rollover_hour=4)
+    metrics.reset(at("2026-10-20 04:00:00"))
+    metrics.record_sale(100.0, "Cash", TWO_PAV_BHAJI, at("2026-10-20 09:00:00"))
+
+    metrics.rollover_hour = 6
+    stats = metrics.snapshot(at("2026-10-20 10:00:00"))
+    assert (stats["bills"], stats["total"], stats["shift_start"]) == (1, 100.0, at("2026-10-20 04:00:00"))
+
+    # The shift ends when it was due to; the changeover shift after it ends at the new hour
+    assert metrics.snapshot(at("2026-10-21 03:59:59"))["bills"] == 1
+    assert metrics.snapshot(at("2026-10-21 04:00:00"))["shift_start"] == at("2026-10-21 04:00:00")
+    assert metrics.snapshot(at("2026-10-21 06:00:00"))["shift_start"] == at("2026-10-21 06:00:00")
+    assert metrics.snapshot(at("2026-10-22 05:59:59"))["shift_start"] == at("2026-10-21 06:00:00")
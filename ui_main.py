@@ -7,15 +7,22 @@ from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont, QDoubleValidator, QIcon
 
 from billing import BillLogic
+from dashboard import DashboardTab
 from database import Database
 from history import HistoryTab
+from inventory import Inventory
+from metrics import ShiftMetrics
 from settings import SettingsTab
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.db = Database()
+        self.inventory = Inventory()
         self.load_config() # --- ADDED: Load settings on startup
+        self.load_inventory()
+        self.metrics = ShiftMetrics(rollover_hour=self.shift_rollover_hour)
+        self.metrics.seed(self.db.get_sales_since(self.metrics.seed_from().strftime("%Y-%m-%d %H:%M:%S"))) # Only DB read for the dashboard
         self.init_ui()
     
     def load_config(self):
@@ -24,6 +31,11 @@ class MainWindow(QMainWindow):
         self.gst_rate = float(self.db.get_config_value('gst_rate', '5.0'))
         self.currency_symbol = self.db.get_config_value('currency_symbol', '₹')
         self.bill_footer = self.db.get_config_value('bill_footer', 'Thank You!')
+        self.shift_rollover_hour = int(self.db.get_config_value('shift_rollover_hour', '4'))
+
+    def load_inventory(self):
+        """Loads stock and recipes once; afterwards they are updated in memory after each sale."""
+        self.inventory.load(self.db.get_ingredients(), self.db.get_recipes())
     
     def init_ui(self):
         self.setWindowTitle(self.shop_name) # Use loaded shop name
@@ -40,6 +52,7 @@ class MainWindow(QMainWindow):
         self.billing_tab = self.create_billing_tab()
         self.history_tab_widget = HistoryTab(self.db)
         self.settings_tab_widget = SettingsTab(self.db)
+        self.dashboard_tab_widget = DashboardTab(self.metrics, self.currency_symbol)
         
         # --- MODIFIED: Connect to the new general signal ---
         self.settings_tab_widget.config_changed.connect(self.on_config_changed)
@@ -47,6 +60,7 @@ class MainWindow(QMainWindow):
         self.tabs.addTab(self.billing_tab, "Billing")
         self.tabs.addTab(self.history_tab_widget, "History")
         self.tabs.addTab(self.settings_tab_widget, "Settings")
+        self.tabs.addTab(self.dashboard_tab_widget, "Live Shift")
         
         self.tabs.currentChanged.connect(self.on_tab_change)
 
@@ -56,6 +70,10 @@ class MainWindow(QMainWindow):
         self.setWindowTitle(self.shop_name)
         self.gst_checkbox.setText(f"Apply GST ({self.gst_rate}%)")
         self.update_totals() # Recalculate bill with new GST rate if needed
+        self.load_inventory() # Stock or recipes may have been edited
+        self.metrics.rollover_hour = self.shift_rollover_hour # The current shift still ends at the old hour
+        self.dashboard_tab_widget.set_currency_symbol(self.currency_symbol)
+        self.update_stock_indicators()
         # Note: Some changes like menu item prices require a restart to reflect on the billing screen buttons.
         # This could be improved further with more signals, but a restart is a simple and reliable solution for now.
 
@@ -74,12 +92,14 @@ class MainWindow(QMainWindow):
         menu_label = QLabel("MENU"); menu_label.setFont(QFont("Arial", 18, QFont.Bold)); left_layout.addWidget(menu_label)
         menu_items = self.db.get_menu_items()
         menu_grid = QGridLayout()
+        self.menu_buttons = {} # name -> (button, label text), used for low-stock flags
         row, col = 0, 0
         for name, price in menu_items:
             # --- MODIFIED: Use loaded currency symbol ---
             btn = QPushButton(f"{name}\n{self.currency_symbol}{price:.2f}")
             btn.setMinimumHeight(80)
             btn.clicked.connect(lambda _, n=name, p=price: self.add_item_to_bill(n, p))
+            self.menu_buttons[name] = (btn, btn.text())
             menu_grid.addWidget(btn, row, col)
             col += 1
             if col > 1: col = 0; row += 1
@@ -118,6 +138,7 @@ class MainWindow(QMainWindow):
         controls_layout.addWidget(QLabel("Discount:")); controls_layout.addWidget(self.discount_spinbox); controls_layout.addWidget(self.gst_checkbox); controls_layout.addStretch(); controls_layout.addWidget(self.cash_radio); controls_layout.addWidget(self.upi_radio)
         action_layout = QHBoxLayout(); self.new_bill_button = QPushButton("New Bill (Clear)"); self.save_print_button = QPushButton("SAVE & COMPLETE"); self.save_print_button.setStyleSheet("background-color: #1976D2; color: white; padding: 10px;")
         self.new_bill_button.clicked.connect(self.clear_bill); self.save_print_button.clicked.connect(self.process_sale); action_layout.addWidget(self.new_bill_button); action_layout.addWidget(self.save_print_button)
+        self.update_stock_indicators()
         right_layout.addWidget(bill_label); right_layout.addWidget(self.bill_table, 1); right_layout.addLayout(totals_grid); right_layout.addWidget(cash_frame); right_layout.addLayout(controls_layout); right_layout.addLayout(action_layout)
         return billing_widget
 
@@ -181,6 +202,20 @@ class MainWindow(QMainWindow):
     def add_item_to_bill(self, name, price):
         self.bill.add_item(name, price); self.update_bill_display(); self.update_totals()
 
+    def update_stock_indicators(self):
+        """Flags low-stock menu buttons and disables ones that cannot be made, using the in-memory stock."""
+        bill_items = self.bill.get_bill_items()
+        for name, (btn, text) in self.menu_buttons.items():
+            portions = self.inventory.portions_left(name, bill_items)
+            if portions is None: # No recipe, so stock is not tracked for this item
+                btn.setEnabled(True); btn.setText(text); btn.setStyleSheet("")
+            elif portions == 0:
+                btn.setEnabled(False); btn.setText(f"{text}\nOUT OF STOCK"); btn.setStyleSheet("color: #9E9E9E;")
+            elif self.inventory.is_low(name, bill_items):
+                btn.setEnabled(True); btn.setText(f"{text}\nLow: {portions} left"); btn.setStyleSheet("background-color: #FFE082;")
+            else:
+                btn.setEnabled(True); btn.setText(text); btn.setStyleSheet("")
+
     def update_bill_display(self):
         items = self.bill.get_bill_items(); self.bill_table.setRowCount(len(items))
         for row_idx, item in enumerate(items):
@@ -192,8 +227,10 @@ class MainWindow(QMainWindow):
             plus_btn.clicked.connect(lambda _, n=item['name']: self.change_quantity(n, 1)); minus_btn.clicked.connect(lambda _, n=item['name']: self.change_quantity(n, -1))
             btn_layout.addWidget(minus_btn); btn_layout.addWidget(plus_btn); btn_layout.setContentsMargins(0, 0, 0, 0); btn_widget_container = QWidget(); btn_widget_container.setLayout(btn_layout)
             self.bill_table.setCellWidget(row_idx, 4, btn_widget_container)
+        self.update_stock_indicators()
     
     def change_quantity(self, item_name, change):
+        if change > 0 and self.inventory.portions_left(item_name, self.bill.get_bill_items()) == 0: return # Out of stock
         self.bill.update_quantity(item_name, change); self.update_bill_display(); self.update_totals()
 
     def clear_bill(self):
@@ -206,5 +243,7 @@ class MainWindow(QMainWindow):
         payment_method = "UPI" if self.upi_radio.isChecked() else "Cash"
         bill_details = { "items": self.bill.get_bill_items(), "payment_method": payment_method, **totals }
         if not self.db.save_sale(bill_details): QMessageBox.critical(self, "Database Error", "Failed to save the sale."); return
+        self.inventory.deduct(bill_details['items'])
+        self.metrics.record_sale(bill_details['final_total'], payment_method, bill_details['items'])
         self.print_bill(bill_details)
         self.clear_bill()
\ No newline at end of file